@@ -4,12 +4,16 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 import uuid
+import asyncio
 import logging
 
-from models.database import get_db
-from models.models import CollectionJob, JobStatus, SortType, TimeFilter, RedditPost, RedditComment
+from models.database import get_db, SessionLocal
+from models.models import CollectionJob, JobStatus, SortType, TimeFilter, RedditComment
+from services.analytics import analytics_service
 from services.data_collector import DataCollector
 from services.sentiment_analyzer import sentiment_analyzer
+from services.supabase_service import supabase_service
+from services.text_metrics import score_batch, to_optional_floats
 
 router = APIRouter(prefix="/api/collect", tags=["collection"])
 logger = logging.getLogger(__name__)
@@ -258,12 +262,18 @@ async def delete_collection_job(
 
 # Background Collection Function
 
+def refresh_analytics_view():
+    """Refresh analytics_mv on a dedicated session (run in a worker thread)"""
+    db = SessionLocal()
+    try:
+        analytics_service.refresh_analytics_view(db)
+    finally:
+        db.close()
+
 async def run_collection_job(job_id: int, job_params: Dict[str, Any]):
     """
     Background task to run a collection job with real data collection
     """
-    from models.database import SessionLocal
-    
     db = SessionLocal()
     collector = DataCollector()
     
@@ -290,6 +300,9 @@ async def run_collection_job(job_id: int, job_params: Dict[str, Any]):
         total_collected_posts = 0
         total_collected_comments = 0
         all_collected_data = []
+        # Overlapping sort types and time filters return the same posts again;
+        # only the first sighting in this job is counted and gets its comments
+        stored_reddit_ids = set()
         
         for subreddit in job.subreddits:
             for sort_type in job.sort_types:
@@ -323,35 +336,35 @@ async def run_collection_job(job_id: int, job_params: Dict[str, Any]):
                         
                         # Store collected data with sentiment analysis
                         posts_for_sentiment = []
-                        reddit_posts = []
+                        post_rows = []
                         
                         # Prepare posts and sentiment analysis
                         for post_data in posts_data:
                             try:
-                                # Create RedditPost record
+                                # Build reddit_posts row
                                 created_utc = post_data.get('created_utc')
                                 if isinstance(created_utc, (int, float)):
                                     created_utc = datetime.fromtimestamp(created_utc)
                                 elif not isinstance(created_utc, datetime):
                                     created_utc = datetime.utcnow()
                                 
-                                reddit_post = RedditPost(
-                                    collection_job_id=job.id,
-                                    reddit_id=post_data.get('reddit_id'),
-                                    title=post_data.get('title'),
-                                    selftext=post_data.get('selftext'),
-                                    url=post_data.get('url'),
-                                    permalink=post_data.get('permalink'),
-                                    subreddit=post_data.get('subreddit'),
-                                    author=post_data.get('author') if not job.anonymize_users else None,
-                                    score=post_data.get('score', 0),
-                                    upvote_ratio=post_data.get('upvote_ratio', 0.0),
-                                    num_comments=post_data.get('num_comments', 0),
-                                    is_nsfw=post_data.get('over_18', False),
-                                    created_utc=created_utc
-                                )
-                                
-                                reddit_posts.append(reddit_post)
+                                post_rows.append({
+                                    'collection_job_id': job.id,
+                                    'reddit_id': post_data.get('reddit_id'),
+                                    'title': post_data.get('title'),
+                                    'selftext': post_data.get('selftext'),
+                                    'url': post_data.get('url'),
+                                    'permalink': post_data.get('permalink'),
+                                    'subreddit': post_data.get('subreddit'),
+                                    'author': post_data.get('author') if not job.anonymize_users else None,
+                                    'score': post_data.get('score', 0),
+                                    'upvote_ratio': post_data.get('upvote_ratio', 0.0),
+                                    'num_comments': post_data.get('num_comments', 0),
+                                    'is_nsfw': post_data.get('over_18', False),
+                                    'created_utc': created_utc,
+                                    'sentiment_score': None,
+                                    'readability_score': None
+                                })
                                 
                                 # Prepare text for sentiment analysis
                                 title = post_data.get('title', '')
@@ -377,20 +390,39 @@ async def run_collection_job(job_id: int, job_params: Dict[str, Any]):
                         else:
                             sentiment_scores = [None] * len(posts_for_sentiment)
                         
-                        # Store posts with sentiment scores
-                        for reddit_post, sentiment_score in zip(reddit_posts, sentiment_scores):
+                        # Readability for the whole batch in one vectorized pass
+                        readability_scores = to_optional_floats(score_batch(posts_for_sentiment))
+                        
+                        # Store posts with sentiment and readability scores in one multi-row upsert
+                        for post_row, sentiment_score, readability_score in zip(post_rows, sentiment_scores, readability_scores):
+                            post_row['sentiment_score'] = sentiment_score
+                            post_row['readability_score'] = readability_score
+                        
+                        try:
+                            post_ids = await supabase_service.bulk_upsert_via_core(post_rows)
+                        except Exception as e:
+                            logger.error(f"Error storing posts from r/{subreddit}: {e}")
+                            post_ids = {}
+                        
+                        new_post_ids = {
+                            reddit_id: post_id for reddit_id, post_id in post_ids.items()
+                            if reddit_id not in stored_reddit_ids
+                        }
+                        stored_reddit_ids.update(new_post_ids)
+                        total_collected_posts += len(new_post_ids)
+                        
+                        for post_row in post_rows:
+                            # pop() also skips a post repeated within this batch
+                            post_id = new_post_ids.pop(post_row['reddit_id'], None)
+                            if post_id is None:
+                                continue
+                            
                             try:
-                                reddit_post.sentiment_score = sentiment_score
-                                db.add(reddit_post)
-                                db.flush()  # Get the ID without committing
-                                
-                                total_collected_posts += 1
-                                
                                 # Collect comments if requested
                                 if job.comment_limit > 0:
                                     try:
                                         comments_data = await collector.get_top_comments_by_criteria(
-                                            post_id=reddit_post.reddit_id,
+                                            post_id=post_row['reddit_id'],
                                             limit=min(job.comment_limit, 50)
                                         )
                                         
@@ -398,7 +430,8 @@ async def run_collection_job(job_id: int, job_params: Dict[str, Any]):
                                             try:
                                                 reddit_comment = RedditComment(
                                                     reddit_id=comment_data['reddit_id'],
-                                                    post_id=reddit_post.id,
+                                                    post_id=post_id,
+                                                    collection_job_id=job.id,
                                                     parent_id=comment_data.get('parent_id'),
                                                     author=comment_data.get('author'),
                                                     body=comment_data['body'],
@@ -413,11 +446,11 @@ async def run_collection_job(job_id: int, job_params: Dict[str, Any]):
                                                 logger.error(f"Error storing comment: {e}")
                                                 continue
                                     except Exception as e:
-                                        logger.warning(f"Error collecting comments for post {reddit_post.reddit_id}: {e}")
+                                        logger.warning(f"Error collecting comments for post {post_row['reddit_id']}: {e}")
                                         continue
                                 
                             except Exception as e:
-                                logger.error(f"Error storing post {post_data.get('id')}: {e}")
+                                logger.error(f"Error storing comments for post {post_row['reddit_id']}: {e}")
                                 continue
                         
                         # Update progress
@@ -430,6 +463,7 @@ async def run_collection_job(job_id: int, job_params: Dict[str, Any]):
                         logger.info(f"Collected {len(posts_data)} posts from r/{subreddit}")
                         
                     except Exception as e:
+                        db.rollback()
                         logger.error(f"Error collecting from r/{subreddit} ({sort_type}, {time_filter}): {e}")
                         continue
         
@@ -439,10 +473,17 @@ async def run_collection_job(job_id: int, job_params: Dict[str, Any]):
         job.progress = 100
         db.commit()
         
+        try:
+            # The refresh re-aggregates every job's posts; keep it off the event loop
+            await asyncio.to_thread(refresh_analytics_view)
+        except Exception as e:
+            logger.warning(f"Failed to refresh analytics view after job {job.job_id}: {e}")
+        
         logger.info(f"Completed collection job {job.job_id}: {total_collected_posts} posts, {total_collected_comments} comments")
         
     except Exception as e:
         logger.error(f"Collection job {job_id} failed: {e}")
+        db.rollback()
         
         # Mark job as failed
         job = db.query(CollectionJob).filter(CollectionJob.id == job_id).first()
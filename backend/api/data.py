@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import and_, or_, desc, asc, func, select, lambda_stmt
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from pydantic import BaseModel, Field
@@ -8,7 +8,7 @@ import logging
 
 from models.database import get_db
 from models.models import CollectionJob, RedditPost, RedditComment, RedditUser, Analytics, JobStatus
-from services.analytics import AnalyticsService
+from services.analytics import analytics_service
 
 router = APIRouter(prefix="/api/data", tags=["data"])
 logger = logging.getLogger(__name__)
@@ -131,96 +131,116 @@ async def query_posts(
     start_time = time.time()
     
     try:
-        # Build base query
-        query_obj = db.query(RedditPost)
+        # Build base statements. lambda_stmt caches the compiled SQL per filter
+        # combination; the filter values below travel as bound parameters.
+        stmt = lambda_stmt(lambda: select(RedditPost))
+        count_stmt = lambda_stmt(lambda: select(func.count()).select_from(RedditPost))
+        criteria = []
         
         # Join with CollectionJob for job-based filtering
         if query.job_ids or query.job_status:
-            query_obj = query_obj.join(CollectionJob)
+            criteria.append(lambda s: s.join(RedditPost.collection_job))
             
-            if query.job_ids:
-                query_obj = query_obj.filter(CollectionJob.job_id.in_(query.job_ids))
+            job_ids = query.job_ids
+            job_status = query.job_status
+            if job_ids:
+                criteria.append(lambda s: s.where(CollectionJob.job_id.in_(job_ids)))
             
-            if query.job_status:
-                query_obj = query_obj.filter(CollectionJob.status == query.job_status)
+            if job_status:
+                criteria.append(lambda s: s.where(CollectionJob.status == job_status))
         
         # Subreddit filtering
-        if query.subreddits:
-            query_obj = query_obj.filter(RedditPost.subreddit.in_(query.subreddits))
+        subreddits = query.subreddits
+        if subreddits:
+            criteria.append(lambda s: s.where(RedditPost.subreddit.in_(subreddits)))
         
         # Keyword filtering
         if query.keywords:
-            keyword_conditions = []
-            for keyword in query.keywords:
-                keyword_conditions.append(
-                    or_(
-                        RedditPost.title.ilike(f"%{keyword}%"),
-                        RedditPost.selftext.ilike(f"%{keyword}%")
-                    )
+            keyword_clause = or_(*[
+                or_(
+                    RedditPost.title.ilike(f"%{keyword}%"),
+                    RedditPost.selftext.ilike(f"%{keyword}%")
                 )
-            query_obj = query_obj.filter(or_(*keyword_conditions))
+                for keyword in query.keywords
+            ])
+            criteria.append(lambda s: s.where(keyword_clause))
         
         if query.exclude_keywords:
-            for keyword in query.exclude_keywords:
-                query_obj = query_obj.filter(
-                    and_(
-                        ~RedditPost.title.ilike(f"%{keyword}%"),
-                        ~RedditPost.selftext.ilike(f"%{keyword}%")
-                    )
+            exclude_clause = and_(*[
+                and_(
+                    ~RedditPost.title.ilike(f"%{keyword}%"),
+                    ~RedditPost.selftext.ilike(f"%{keyword}%")
                 )
+                for keyword in query.exclude_keywords
+            ])
+            criteria.append(lambda s: s.where(exclude_clause))
         
         # Score filtering
-        if query.min_score is not None:
-            query_obj = query_obj.filter(RedditPost.score >= query.min_score)
-        if query.max_score is not None:
-            query_obj = query_obj.filter(RedditPost.score <= query.max_score)
+        min_score, max_score = query.min_score, query.max_score
+        if min_score is not None:
+            criteria.append(lambda s: s.where(RedditPost.score >= min_score))
+        if max_score is not None:
+            criteria.append(lambda s: s.where(RedditPost.score <= max_score))
         
         # Engagement filtering
-        if query.min_upvote_ratio is not None:
-            query_obj = query_obj.filter(RedditPost.upvote_ratio >= query.min_upvote_ratio)
-        if query.min_comments is not None:
-            query_obj = query_obj.filter(RedditPost.num_comments >= query.min_comments)
-        if query.max_comments is not None:
-            query_obj = query_obj.filter(RedditPost.num_comments <= query.max_comments)
+        min_upvote_ratio = query.min_upvote_ratio
+        min_comments, max_comments = query.min_comments, query.max_comments
+        if min_upvote_ratio is not None:
+            criteria.append(lambda s: s.where(RedditPost.upvote_ratio >= min_upvote_ratio))
+        if min_comments is not None:
+            criteria.append(lambda s: s.where(RedditPost.num_comments >= min_comments))
+        if max_comments is not None:
+            criteria.append(lambda s: s.where(RedditPost.num_comments <= max_comments))
         
         # Content type filtering
+        post_types = query.post_types
         if query.exclude_nsfw:
-            query_obj = query_obj.filter(RedditPost.is_nsfw == False)
+            criteria.append(lambda s: s.where(RedditPost.is_nsfw == False))
         if query.exclude_stickied:
-            query_obj = query_obj.filter(RedditPost.is_stickied == False)
-        if query.post_types:
-            query_obj = query_obj.filter(RedditPost.post_hint.in_(query.post_types))
+            criteria.append(lambda s: s.where(RedditPost.is_stickied == False))
+        if post_types:
+            criteria.append(lambda s: s.where(RedditPost.post_hint.in_(post_types)))
         
         # Date filtering
-        if query.created_after:
-            query_obj = query_obj.filter(RedditPost.created_utc >= query.created_after)
-        if query.created_before:
-            query_obj = query_obj.filter(RedditPost.created_utc <= query.created_before)
-        if query.collected_after:
-            query_obj = query_obj.filter(RedditPost.collected_at >= query.collected_after)
-        if query.collected_before:
-            query_obj = query_obj.filter(RedditPost.collected_at <= query.collected_before)
+        created_after, created_before = query.created_after, query.created_before
+        collected_after, collected_before = query.collected_after, query.collected_before
+        if created_after:
+            criteria.append(lambda s: s.where(RedditPost.created_utc >= created_after))
+        if created_before:
+            criteria.append(lambda s: s.where(RedditPost.created_utc <= created_before))
+        if collected_after:
+            criteria.append(lambda s: s.where(RedditPost.collected_at >= collected_after))
+        if collected_before:
+            criteria.append(lambda s: s.where(RedditPost.collected_at <= collected_before))
         
         # Author filtering
-        if query.authors:
-            query_obj = query_obj.filter(RedditPost.author.in_(query.authors))
-        if query.exclude_authors:
-            query_obj = query_obj.filter(~RedditPost.author.in_(query.exclude_authors))
+        authors, exclude_authors = query.authors, query.exclude_authors
+        if authors:
+            criteria.append(lambda s: s.where(RedditPost.author.in_(authors)))
+        if exclude_authors:
+            criteria.append(lambda s: s.where(~RedditPost.author.in_(exclude_authors)))
         if query.exclude_deleted:
-            query_obj = query_obj.filter(RedditPost.author.isnot(None))
+            criteria.append(lambda s: s.where(RedditPost.author.isnot(None)))
+        
+        for criterion in criteria:
+            stmt += criterion
+            count_stmt += criterion
         
         # Get total count before pagination
-        total_count = query_obj.count()
+        total_count = db.execute(count_stmt).scalar()
         
         # Sorting
         sort_field = getattr(RedditPost, query.sort_by, RedditPost.created_utc)
         if query.sort_order.lower() == "asc":
-            query_obj = query_obj.order_by(asc(sort_field))
+            order = asc(sort_field)
         else:
-            query_obj = query_obj.order_by(desc(sort_field))
+            order = desc(sort_field)
+        stmt += lambda s: s.order_by(order)
         
         # Pagination
-        posts = query_obj.offset(query.offset).limit(query.limit).all()
+        offset, limit = query.offset, query.limit
+        stmt += lambda s: s.offset(offset).limit(limit)
+        posts = db.execute(stmt).scalars().all()
         
         # Convert to response format
         results = []
@@ -287,7 +307,7 @@ async def query_comments(
         query_obj = query_obj.join(RedditPost)
         
         if query.job_ids:
-            query_obj = query_obj.join(CollectionJob)
+            query_obj = query_obj.join(CollectionJob, RedditComment.collection_job_id == CollectionJob.id)
             query_obj = query_obj.filter(CollectionJob.job_id.in_(query.job_ids))
         
         # Post filtering
@@ -348,8 +368,9 @@ async def query_comments(
         else:
             query_obj = query_obj.order_by(desc(sort_field))
         
-        # Pagination
-        comments = query_obj.offset(query.offset).limit(query.limit).all()
+        # Pagination; post context comes from the existing join, not a query per comment
+        comments = query_obj.options(contains_eager(RedditComment.post)) \
+            .offset(query.offset).limit(query.limit).all()
         
         # Convert to response format
         results = []
@@ -408,6 +429,12 @@ async def get_job_analytics(
         if not job:
             raise HTTPException(status_code=404, detail="Collection job not found")
         
+        # Completed jobs are served from analytics_mv, refreshed on completion
+        if job.status == JobStatus.COMPLETED and db.get_bind().dialect.name == "postgresql":
+            aggregates = analytics_service.get_job_post_aggregates(job.id, db)
+            if aggregates:
+                return _analytics_from_view(aggregates)
+        
         # Get all posts for this job
         posts = db.query(RedditPost).filter(RedditPost.collection_job_id == job.id).all()
         
@@ -503,6 +530,38 @@ async def get_job_analytics(
         logger.error(f"Analytics query failed: {e}")
         raise HTTPException(status_code=500, detail=f"Analytics query failed: {str(e)}")
 
+def _analytics_from_view(row: Dict[str, Any]) -> PostAnalyticsResponse:
+    """Shape an analytics_mv row like the Python-computed analytics"""
+    total_posts = row["total_posts"]
+    return PostAnalyticsResponse(
+        total_posts=total_posts,
+        unique_subreddits=row["unique_subreddits"],
+        unique_authors=row["unique_authors"],
+        date_range={
+            "earliest": row["earliest_post"].isoformat() if row["earliest_post"] else None,
+            "latest": row["latest_post"].isoformat() if row["latest_post"] else None
+        },
+        score_stats={
+            "mean": row["avg_score"] or 0,
+            "median": row["median_score"] or 0,
+            "min": row["min_score"] or 0,
+            "max": row["max_score"] or 0
+        },
+        engagement_stats={
+            "avg_upvote_ratio": row["avg_upvote_ratio"] or 0,
+            "avg_comments": row["avg_comments"] or 0,
+            "total_comments": row["total_comments"]
+        },
+        content_distribution={
+            "total": total_posts,
+            "nsfw": row["nsfw_posts"],
+            "stickied": row["stickied_posts"],
+            "regular": total_posts - row["nsfw_posts"] - row["stickied_posts"]
+        },
+        top_posts=row["top_posts"],
+        subreddit_breakdown=row["subreddit_breakdown"]
+    )
+
 @router.get("/summary", response_model=Dict[str, Any])
 async def get_data_summary(
     db: Session = Depends(get_db)
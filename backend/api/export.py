@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Response
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, selectinload
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from pydantic import BaseModel, Field
@@ -203,11 +203,12 @@ async def export_comments(
         if format.lower() not in ["csv", "json", "jsonl", "parquet"]:
             raise HTTPException(status_code=400, detail="Supported formats: csv, json, jsonl, parquet")
         
-        # Build query (simplified version of Data API logic)
-        query_obj = db.query(RedditComment).join(RedditPost)
+        # Build query (simplified version of Data API logic); the post join also
+        # populates comment.post so post context needs no per-comment query
+        query_obj = db.query(RedditComment).join(RedditPost).options(contains_eager(RedditComment.post))
         
         if export_request.job_ids:
-            query_obj = query_obj.join(CollectionJob)
+            query_obj = query_obj.join(CollectionJob, RedditComment.collection_job_id == CollectionJob.id)
             query_obj = query_obj.filter(CollectionJob.job_id.in_(export_request.job_ids))
         
         if export_request.subreddits:
@@ -319,8 +320,11 @@ async def export_job_data(
         if not job:
             raise HTTPException(status_code=404, detail="Collection job not found")
         
-        # Get job posts
-        posts = db.query(RedditPost).filter(RedditPost.collection_job_id == job.id).all()
+        # Get job posts, loading all their comments in one extra query if requested
+        posts_query = db.query(RedditPost).filter(RedditPost.collection_job_id == job.id)
+        if include_comments:
+            posts_query = posts_query.options(selectinload(RedditPost.comments))
+        posts = posts_query.all()
         
         if not posts:
             raise HTTPException(status_code=404, detail="No data found for this job")
@@ -360,7 +364,6 @@ async def export_job_data(
             
             # Include comments if requested
             if include_comments:
-                comments = db.query(RedditComment).filter(RedditComment.post_id == post.id).all()
                 post_data["comments"] = [
                     {
                         "reddit_id": comment.reddit_id,
@@ -370,7 +373,7 @@ async def export_job_data(
                         "depth": comment.depth,
                         "created_utc": comment.created_utc.isoformat() if comment.created_utc else None
                     }
-                    for comment in comments
+                    for comment in post.comments
                 ]
             
             export_data["posts"].append(post_data)
@@ -34,6 +34,12 @@ def init_database():
         # Create all tables
         Base.metadata.create_all(bind=engine)
         
+        if engine.dialect.name == "postgresql":
+            migrate_json_columns()
+        migrate_job_status_column()
+        migrate_job_scoped_reddit_ids()
+        migrate_post_indexes()
+        
         logger.info("Database tables created successfully!")
         logger.info("Tables created:")
         for table_name in Base.metadata.tables.keys():
@@ -45,6 +51,140 @@ def init_database():
         logger.error(f"Error creating database tables: {e}")
         return False
 
+def migrate_json_columns():
+    """Convert json columns left by earlier schema versions to jsonb and index them (PostgreSQL only)"""
+    from sqlalchemy import text
+    
+    table_names = list(Base.metadata.tables.keys())
+    with engine.begin() as connection:
+        json_columns = connection.execute(
+            text(
+                "SELECT table_name, column_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND data_type = 'json' "
+                "AND table_name = ANY(:tables)"
+            ),
+            {"tables": table_names}
+        ).all()
+        
+        for table_name, column_name in json_columns:
+            logger.info(f"Converting {table_name}.{column_name} to jsonb")
+            connection.execute(text(
+                f'ALTER TABLE "{table_name}" ALTER COLUMN "{column_name}" '
+                f'TYPE jsonb USING "{column_name}"::jsonb'
+            ))
+        
+        # GIN indexes need jsonb, and create_all skips existing tables
+        for index in CollectionJob.__table__.indexes:
+            if index.name in ("idx_jobs_keywords_gin", "idx_jobs_subreddits_gin"):
+                index.create(bind=connection, checkfirst=True)
+
+def migrate_job_status_column():
+    """Convert a text/enum collection_jobs.status column to smallint codes"""
+    from sqlalchemy import text
+    from models.models import JOB_STATUSES
+    
+    # Old values are either enum names (PENDING) or enum values (pending)
+    cases = " ".join(
+        f"WHEN '{status.value}' THEN {code}" for code, status in enumerate(JOB_STATUSES)
+    )
+    
+    if engine.dialect.name == "sqlite":
+        # SQLite cannot change a column type in place; rewrite the values as codes,
+        # which JobStatusType also decodes from the old TEXT column
+        legacy_values = ", ".join(f"'{status.value}'" for status in JOB_STATUSES)
+        with engine.begin() as connection:
+            result = connection.execute(text(
+                f"UPDATE collection_jobs SET status = CASE lower(status) {cases} END "
+                f"WHERE lower(status) IN ({legacy_values})"
+            ))
+            if result.rowcount:
+                logger.info(f"Converted {result.rowcount} collection_jobs.status values to codes")
+        return
+    
+    with engine.begin() as connection:
+        data_type = connection.execute(text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_schema = current_schema() "
+            "AND table_name = 'collection_jobs' AND column_name = 'status'"
+        )).scalar()
+        if data_type in (None, "smallint"):
+            return
+        
+        logger.info(f"Converting collection_jobs.status from {data_type} to smallint")
+        connection.execute(text(
+            "ALTER TABLE collection_jobs "
+            "ALTER COLUMN status DROP DEFAULT, "
+            f"ALTER COLUMN status TYPE smallint USING (CASE lower(status::text) {cases} END), "
+            "ALTER COLUMN status SET DEFAULT 0, "
+            "ADD CONSTRAINT ck_collection_jobs_status CHECK (status IN (0, 1, 2, 3, 4))"
+        ))
+        # Indexes on status are rebuilt by ALTER COLUMN TYPE; the native enum type is now unused
+        connection.execute(text("DROP TYPE IF EXISTS jobstatus"))
+
+def migrate_job_scoped_reddit_ids():
+    """Make reddit_id unique per collection job and backfill reddit_comments.collection_job_id"""
+    from sqlalchemy import inspect, text
+    
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        
+        comment_columns = {column["name"] for column in inspector.get_columns("reddit_comments")}
+        if "collection_job_id" not in comment_columns:
+            logger.info("Adding reddit_comments.collection_job_id")
+            connection.execute(text(
+                "ALTER TABLE reddit_comments "
+                "ADD COLUMN collection_job_id INTEGER REFERENCES collection_jobs(id)"
+            ))
+        # Correlated subquery rather than UPDATE ... FROM so SQLite runs it too
+        connection.execute(text(
+            "UPDATE reddit_comments SET collection_job_id = ("
+            "SELECT p.collection_job_id FROM reddit_posts p WHERE p.id = reddit_comments.post_id"
+            ") WHERE collection_job_id IS NULL"
+        ))
+        
+        job_scoped_key = {"reddit_id", "collection_job_id"}
+        for table_name in ("reddit_posts", "reddit_comments"):
+            indexes = inspector.get_indexes(table_name)
+            
+            # Earlier schemas made reddit_id globally unique through its index
+            index_name = f"ix_{table_name}_reddit_id"
+            if any(index["name"] == index_name and index["unique"] for index in indexes):
+                logger.info(f"Scoping {table_name}.reddit_id uniqueness to collection_job_id")
+                connection.execute(text(f'DROP INDEX "{index_name}"'))
+                connection.execute(text(f'CREATE INDEX "{index_name}" ON "{table_name}" (reddit_id)'))
+            
+            has_job_scoped_key = any(
+                set(constraint["column_names"]) == job_scoped_key
+                for constraint in inspector.get_unique_constraints(table_name)
+            ) or any(
+                index["unique"] and set(index["column_names"]) == job_scoped_key
+                for index in indexes
+            )
+            if not has_job_scoped_key:
+                connection.execute(text(
+                    f'CREATE UNIQUE INDEX "uq_{table_name}_reddit_id_job" '
+                    f'ON "{table_name}" (reddit_id, collection_job_id)'
+                ))
+
+def migrate_post_indexes():
+    """Create the covering and BRIN post indexes on existing databases and drop the indexes they replace"""
+    from sqlalchemy import text
+    
+    with engine.begin() as connection:
+        # Superseded by idx_posts_hot (subreddit, score DESC) INCLUDE (...)
+        for index_name in ("idx_reddit_posts_subreddit_score", "ix_reddit_posts_subreddit"):
+            connection.execute(text(f'DROP INDEX IF EXISTS "{index_name}"'))
+        
+        # Earlier versions also built the BRIN index elsewhere, as a plain btree
+        if engine.dialect.name != "postgresql":
+            connection.execute(text('DROP INDEX IF EXISTS "idx_posts_collected_brin"'))
+        
+        # create_all skips tables that already exist, including their new indexes
+        # (the BRIN index is PostgreSQL only through its ddl_if guard)
+        for index in RedditPost.__table__.indexes:
+            if index.name in ("idx_posts_hot", "idx_posts_collected_brin"):
+                index.create(bind=connection, checkfirst=True)
+
 def check_database_connection():
     """Check if database connection is working"""
     try:
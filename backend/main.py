@@ -5,7 +5,7 @@ import logging
 import uvicorn
 from contextlib import asynccontextmanager
 
-from models.database import engine, Base, USE_SUPABASE, supabase_client
+from models.database import engine, Base, USE_SUPABASE, SUPABASE_ENABLED
 from api.scenarios import router as scenarios_router
 from api.query import router as query_router
 from api.collect import router as collect_router
@@ -32,7 +32,7 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Trendit API server...")
     
     # Log database configuration
-    if USE_SUPABASE and supabase_client:
+    if SUPABASE_ENABLED:
         logger.info("Using Supabase as database backend")
     else:
         logger.info("Using standard PostgreSQL/SQLite database")
@@ -129,7 +129,7 @@ async def health_check():
         ])
         
         # Check Supabase status
-        supabase_status = "enabled" if USE_SUPABASE and supabase_client else "disabled"
+        supabase_status = "enabled" if SUPABASE_ENABLED else "disabled"
         
         return {
             "status": "healthy",
@@ -1,7 +1,11 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 import os
+import functools
+import importlib.util
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,39 +14,122 @@ load_dotenv()
 # Supports SQLite (dev/testing), PostgreSQL, and Supabase
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./trendit.db")
 USE_SUPABASE = os.getenv("USE_SUPABASE", "false").lower() == "true"
+# Direct PostgreSQL connection to the Supabase database (used for LISTEN/NOTIFY job updates)
+SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
 
-# Initialize Supabase client if enabled
-supabase_client = None
-if USE_SUPABASE:
-    try:
-        from supabase import create_client
-        SUPABASE_URL = os.getenv("SUPABASE_URL")
-        SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
-        
-        if SUPABASE_URL and SUPABASE_KEY:
-            supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
-            # For Supabase, we still use the PostgreSQL connection string for SQLAlchemy
-            # but can also use the Supabase client for additional features
-            if not DATABASE_URL or DATABASE_URL.startswith("sqlite"):
-                # Construct PostgreSQL URL from Supabase credentials if needed
-                SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
-                if SUPABASE_DB_URL:
-                    DATABASE_URL = SUPABASE_DB_URL
-    except ImportError:
-        print("Warning: Supabase dependencies not installed. Install with: pip install supabase")
-        USE_SUPABASE = False
+# Supabase configuration, read once at import
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
+if USE_SUPABASE and importlib.util.find_spec("supabase") is None:
+    print("Warning: Supabase dependencies not installed. Install with: pip install supabase")
+    USE_SUPABASE = False
+SUPABASE_ENABLED = USE_SUPABASE and bool(SUPABASE_URL and SUPABASE_KEY)
+
+if SUPABASE_ENABLED:
+    # For Supabase, we still use the PostgreSQL connection string for SQLAlchemy
+    # but can also use the Supabase client for additional features
+    if not DATABASE_URL or DATABASE_URL.startswith("sqlite"):
+        # Construct PostgreSQL URL from Supabase credentials if needed
+        if SUPABASE_DB_URL:
+            DATABASE_URL = SUPABASE_DB_URL
+
+# Idle HTTP/2 connections to the Supabase REST API are kept this long (httpx defaults to 5s)
+SUPABASE_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_KEEPALIVE_CONNECTIONS", "20"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60"))
+
+@functools.cache
+def get_supabase_client():
+    """
+    Create the Supabase client on first use and reuse it afterwards
+    
+    All table() calls go through one PostgREST session on HTTP/2 whose idle
+    connections outlive the gaps between collection batches, so later
+    requests skip the TCP/TLS handshake.
+    """
+    if not SUPABASE_ENABLED:
+        return None
+    import httpx
+    from postgrest import SyncPostgrestClient
+    from postgrest.utils import SyncClient as PostgrestSession
+    from supabase import Client
+    
+    limits = httpx.Limits(
+        max_keepalive_connections=SUPABASE_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY
+    )
+    
+    class KeepAlivePostgrestClient(SyncPostgrestClient):
+        def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+            return PostgrestSession(
+                base_url=base_url,
+                headers=headers,
+                timeout=timeout,
+                verify=verify,
+                proxy=proxy,
+                follow_redirects=True,
+                http2=True,
+                limits=limits
+            )
+    
+    class KeepAliveClient(Client):
+        @staticmethod
+        def _init_postgrest_client(rest_url, headers, schema, timeout=120, verify=True, proxy=None):
+            return KeepAlivePostgrestClient(
+                rest_url,
+                headers=headers,
+                schema=schema,
+                timeout=timeout,
+                verify=verify,
+                proxy=proxy
+            )
+    
+    return KeepAliveClient.create(supabase_url=SUPABASE_URL, supabase_key=SUPABASE_KEY)
+
+# Connection pool settings for PostgreSQL/Supabase
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# PgBouncer in transaction mode (6432, or Supabase's pooler on 6543) already
+# multiplexes connections, so pooling again on our side only holds server slots.
+# Direct Supabase connections (5432) should point DATABASE_URL at the pooler.
+PGBOUNCER_PORTS = (6432, 6543)
+DB_USE_NULLPOOL = os.getenv("DB_USE_NULLPOOL", "").lower()
+
+# psycopg2 sends executemany() INSERTs as multi-row VALUES and batches UPDATE/DELETE
+engine_options = {}
+if not DATABASE_URL.startswith("sqlite") and make_url(DATABASE_URL).get_driver_name() == "psycopg2":
+    engine_options["executemany_mode"] = "values_plus_batch"
 
 # SQLite requires check_same_thread=False for FastAPI
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+elif DB_USE_NULLPOOL == "true" or (not DB_USE_NULLPOOL and make_url(DATABASE_URL).port in PGBOUNCER_PORTS):
+    engine = create_engine(DATABASE_URL, poolclass=NullPool, **engine_options)
 else:
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE,
+        **engine_options
+    )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
-    """Dependency to get database session"""
+async def get_db():
+    """
+    Dependency to get database session
+    
+    Declared async so FastAPI opens and closes the session on the event loop.
+    A sync generator dependency is entered and exited through the threadpool,
+    and under load its cleanup can wait behind requests that are themselves
+    blocked on the connection pool, so connections are never returned.
+    """
     db = SessionLocal()
     try:
         yield db
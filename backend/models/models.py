@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey, Index, JSON, Enum
+from sqlalchemy import Column, Integer, SmallInteger, String, DateTime, Float, Boolean, Text, ForeignKey, Index, JSON, CheckConstraint, UniqueConstraint, DDL, event
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 import enum
 
+# Binary JSONB on PostgreSQL (indexable, no re-parse on read); plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 class JobStatus(enum.Enum):
     PENDING = "pending"
     RUNNING = "running" 
@@ -11,6 +16,35 @@ class JobStatus(enum.Enum):
     FAILED = "failed"
     CANCELLED = "cancelled"
 
+# Storage codes for JobStatus, in declaration order (pending=0 ... cancelled=4)
+JOB_STATUSES = list(JobStatus)
+
+def job_status_code(status) -> int:
+    """Convert a JobStatus, its string value, or an existing code to the stored smallint"""
+    if isinstance(status, int):
+        return status
+    return JOB_STATUSES.index(JobStatus(status))
+
+class JobStatusType(TypeDecorator):
+    """Stores JobStatus as a SMALLINT code instead of a text-backed enum"""
+    
+    impl = SmallInteger
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return None if value is None else job_status_code(value)
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # SQLite keeps the TEXT column of databases created before the smallint
+        # codes: codes come back as digit strings, unmigrated rows as enum names
+        if isinstance(value, str):
+            if not value.isdigit():
+                return JobStatus(value.lower())
+            value = int(value)
+        return JOB_STATUSES[value]
+
 class SortType(enum.Enum):
     HOT = "hot"
     NEW = "new"
@@ -40,21 +74,24 @@ class User(Base):
 
 class CollectionJob(Base):
     __tablename__ = "collection_jobs"
+    __table_args__ = (
+        CheckConstraint("status IN (0, 1, 2, 3, 4)", name="ck_collection_jobs_status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(String, unique=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     
     # Collection Parameters
-    subreddits = Column(JSON)  # List of subreddit names
-    sort_types = Column(JSON)  # List of sort types
-    time_filters = Column(JSON)  # List of time filters
+    subreddits = Column(JSONType)  # List of subreddit names
+    sort_types = Column(JSONType)  # List of sort types
+    time_filters = Column(JSONType)  # List of time filters
     post_limit = Column(Integer, default=100)
     comment_limit = Column(Integer, default=50)
     max_comment_depth = Column(Integer, default=3)
     
     # Filters
-    keywords = Column(JSON)  # Search keywords
+    keywords = Column(JSONType)  # Search keywords
     min_score = Column(Integer, default=0)
     min_upvote_ratio = Column(Float, default=0.0)
     date_from = Column(DateTime(timezone=True), nullable=True)
@@ -63,7 +100,7 @@ class CollectionJob(Base):
     anonymize_users = Column(Boolean, default=True)
     
     # Status and Progress
-    status = Column(Enum(JobStatus), default=JobStatus.PENDING)
+    status = Column(JobStatusType, default=JobStatus.PENDING)
     progress = Column(Integer, default=0)
     total_expected = Column(Integer, default=0)
     collected_posts = Column(Integer, default=0)
@@ -83,19 +120,24 @@ class CollectionJob(Base):
 
 class RedditPost(Base):
     __tablename__ = "reddit_posts"
+    __table_args__ = (
+        # reddit_id is unique per job, matching the collection_job_id hash
+        # partitioning of the Supabase schema (supabase_tables.sql)
+        UniqueConstraint('reddit_id', 'collection_job_id', name='uq_reddit_posts_reddit_id_job'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     collection_job_id = Column(Integer, ForeignKey("collection_jobs.id"))
     
     # Reddit Data
-    reddit_id = Column(String, unique=True, index=True)
+    reddit_id = Column(String, index=True)
     title = Column(Text)
     selftext = Column(Text, nullable=True)
     url = Column(String, nullable=True)
     permalink = Column(String)
     
     # Metadata
-    subreddit = Column(String, index=True)
+    subreddit = Column(String)  # indexed by idx_posts_hot
     author = Column(String, nullable=True)  # null if anonymized or deleted
     author_id = Column(String, nullable=True)
     
@@ -125,12 +167,16 @@ class RedditPost(Base):
 
 class RedditComment(Base):
     __tablename__ = "reddit_comments"
+    __table_args__ = (
+        UniqueConstraint('reddit_id', 'collection_job_id', name='uq_reddit_comments_reddit_id_job'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("reddit_posts.id"))
+    collection_job_id = Column(Integer, ForeignKey("collection_jobs.id"))  # denormalized from the post
     
     # Reddit Data
-    reddit_id = Column(String, unique=True, index=True)
+    reddit_id = Column(String, index=True)
     body = Column(Text)
     parent_id = Column(String, nullable=True)  # Parent comment ID
     
@@ -197,18 +243,18 @@ class Analytics(Base):
     avg_upvote_ratio = Column(Float)
     
     # Engagement Metrics
-    top_posts = Column(JSON)  # Top posts by score
-    most_commented = Column(JSON)  # Most commented posts
-    active_users = Column(JSON)  # Most active users
+    top_posts = Column(JSONType)  # Top posts by score
+    most_commented = Column(JSONType)  # Most commented posts
+    active_users = Column(JSONType)  # Most active users
     
     # Content Analysis
-    common_keywords = Column(JSON)  # Most common keywords
-    sentiment_distribution = Column(JSON)  # Sentiment analysis results
-    post_type_distribution = Column(JSON)  # Distribution by post type
+    common_keywords = Column(JSONType)  # Most common keywords
+    sentiment_distribution = Column(JSONType)  # Sentiment analysis results
+    post_type_distribution = Column(JSONType)  # Distribution by post type
     
     # Temporal Analysis
-    posting_patterns = Column(JSON)  # Posting frequency over time
-    engagement_trends = Column(JSON)  # Engagement trends
+    posting_patterns = Column(JSONType)  # Posting frequency over time
+    engagement_trends = Column(JSONType)  # Engagement trends
     
     # Timestamps
     generated_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -217,8 +263,83 @@ class Analytics(Base):
     collection_job = relationship("CollectionJob", back_populates="analytics")
 
 # Database indexes for better performance
-Index('idx_reddit_posts_subreddit_score', RedditPost.subreddit, RedditPost.score)
+# Covering index so subreddit + score queries can be answered by index-only scans
+Index(
+    'idx_posts_hot',
+    RedditPost.subreddit,
+    RedditPost.score.desc(),
+    postgresql_include=['upvote_ratio', 'created_utc', 'num_comments']
+)
 Index('idx_reddit_posts_created_utc', RedditPost.created_utc)
+# collected_at only grows, so a BRIN index stays tiny while pruning time-window scans
+Index('idx_posts_collected_brin', RedditPost.collected_at, postgresql_using='brin').ddl_if(dialect='postgresql')
 Index('idx_reddit_comments_score', RedditComment.score)
 Index('idx_reddit_comments_created_utc', RedditComment.created_utc)
-Index('idx_collection_jobs_status_created', CollectionJob.status, CollectionJob.created_at)
\ No newline at end of file
+Index('idx_collection_jobs_status_created', CollectionJob.status, CollectionJob.created_at)
+
+# GIN indexes for JSONB containment queries (e.g. keywords @> '["fastapi"]'), PostgreSQL only
+Index('idx_jobs_keywords_gin', CollectionJob.keywords, postgresql_using='gin').ddl_if(dialect='postgresql')
+Index('idx_jobs_subreddits_gin', CollectionJob.subreddits, postgresql_using='gin').ddl_if(dialect='postgresql')
+# Per-job post aggregates for the analytics endpoint. The view is rebuilt with
+# REFRESH MATERIALIZED VIEW CONCURRENTLY when a collection job completes, which
+# requires the unique index below. PostgreSQL only; SQLite computes in Python.
+ANALYTICS_MV_DDL = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS analytics_mv AS
+WITH ranked AS (
+    SELECT p.*,
+           row_number() OVER (
+               PARTITION BY p.collection_job_id ORDER BY p.score DESC NULLS LAST
+           ) AS score_rank
+    FROM reddit_posts p
+    WHERE p.collection_job_id IS NOT NULL
+),
+subreddit_counts AS (
+    SELECT collection_job_id, jsonb_object_agg(subreddit, post_count) AS subreddit_breakdown
+    FROM (
+        SELECT collection_job_id, subreddit, count(*) AS post_count
+        FROM reddit_posts
+        WHERE collection_job_id IS NOT NULL AND subreddit IS NOT NULL
+        GROUP BY collection_job_id, subreddit
+    ) s
+    GROUP BY collection_job_id
+)
+SELECT
+    r.collection_job_id,
+    count(*) AS total_posts,
+    count(DISTINCT r.subreddit) AS unique_subreddits,
+    count(DISTINCT r.author) AS unique_authors,
+    min(r.created_utc) AS earliest_post,
+    max(r.created_utc) AS latest_post,
+    avg(r.score)::float AS avg_score,
+    -- Upper median, matching sorted(scores)[len(scores) // 2] in the Python path
+    (array_agg(r.score ORDER BY r.score) FILTER (WHERE r.score IS NOT NULL))[count(r.score) / 2 + 1] AS median_score,
+    min(r.score) AS min_score,
+    max(r.score) AS max_score,
+    avg(r.upvote_ratio)::float AS avg_upvote_ratio,
+    avg(r.num_comments)::float AS avg_comments,
+    coalesce(sum(r.num_comments), 0) AS total_comments,
+    count(*) FILTER (WHERE r.is_nsfw) AS nsfw_posts,
+    count(*) FILTER (WHERE r.is_stickied) AS stickied_posts,
+    coalesce(
+        jsonb_agg(jsonb_build_object(
+            'title', r.title,
+            'score', r.score,
+            'subreddit', r.subreddit,
+            'author', r.author,
+            'num_comments', r.num_comments,
+            'permalink', r.permalink
+        ) ORDER BY r.score_rank) FILTER (WHERE r.score_rank <= 5),
+        '[]'::jsonb
+    ) AS top_posts,
+    coalesce(sc.subreddit_breakdown, '{}'::jsonb) AS subreddit_breakdown
+FROM ranked r
+LEFT JOIN subreddit_counts sc ON sc.collection_job_id = r.collection_job_id
+GROUP BY r.collection_job_id, sc.subreddit_breakdown
+"""
+
+event.listen(Base.metadata, 'after_create', DDL(ANALYTICS_MV_DDL).execute_if(dialect='postgresql'))
+event.listen(
+    Base.metadata,
+    'after_create',
+    DDL('CREATE UNIQUE INDEX IF NOT EXISTS idx_analytics_mv_job ON analytics_mv (collection_job_id)').execute_if(dialect='postgresql')
+)
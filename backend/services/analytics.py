@@ -3,7 +3,8 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from collections import Counter
 import json
-from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.orm import Session, selectinload
 from models.models import CollectionJob, RedditPost, RedditComment, Analytics
 
 logger = logging.getLogger(__name__)
@@ -38,11 +39,11 @@ class AnalyticsService:
                 raise ValueError(f"Collection job {job_id} not found")
             
             # Get all posts and comments for this job
-            posts = db.query(RedditPost).filter(RedditPost.collection_job_id == job.id).all()
-            comments = []
-            for post in posts:
-                post_comments = db.query(RedditComment).filter(RedditComment.post_id == post.id).all()
-                comments.extend(post_comments)
+            posts = db.query(RedditPost) \
+                .options(selectinload(RedditPost.comments)) \
+                .filter(RedditPost.collection_job_id == job.id) \
+                .all()
+            comments = [comment for post in posts for comment in post.comments]
             
             # Generate analytics
             analytics_data = {
@@ -82,6 +83,44 @@ class AnalyticsService:
             logger.error(f"Error generating analytics for job {job_id}: {e}")
             raise
     
+    def refresh_analytics_view(self, db: Session) -> bool:
+        """
+        Rebuild analytics_mv without blocking readers (PostgreSQL only)
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            True if the view was refreshed, False on other dialects
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            return False
+        
+        db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY analytics_mv"))
+        db.commit()
+        return True
+    
+    def get_job_post_aggregates(
+        self,
+        collection_job_pk: int,
+        db: Session
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Read precomputed post aggregates for a job from analytics_mv
+        
+        Args:
+            collection_job_pk: CollectionJob primary key
+            db: Database session
+            
+        Returns:
+            View row as a dict, or None if the job has no row yet
+        """
+        row = db.execute(
+            text("SELECT * FROM analytics_mv WHERE collection_job_id = :job_pk"),
+            {"job_pk": collection_job_pk}
+        ).mappings().first()
+        return dict(row) if row else None
+    
     def _generate_summary_stats(
         self,
         posts: List[RedditPost],
@@ -313,4 +352,7 @@ class AnalyticsService:
             "avg_score_by_subreddit": avg_scores_by_subreddit,
             "most_active_subreddit": max(subreddit_counts, key=subreddit_counts.get) if subreddit_counts else None,
             "highest_scoring_subreddit": max(avg_scores_by_subreddit, key=avg_scores_by_subreddit.get) if avg_scores_by_subreddit else None
-        }
\ No newline at end of file
+        }
+
+# Global instance for easy access
+analytics_service = AnalyticsService()
\ No newline at end of file
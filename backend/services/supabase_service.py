@@ -3,81 +3,136 @@ Supabase service for enhanced database operations and real-time features
 """
 
 import os
+import json
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from itertools import islice
+from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
-from models.database import supabase_client, USE_SUPABASE
+import asyncpg
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models.database import get_supabase_client, SUPABASE_ENABLED, SUPABASE_DB_URL, SessionLocal
+from models.models import RedditPost, JobStatus, JOB_STATUSES, job_status_code
 
 logger = logging.getLogger(__name__)
 
+# REST upserts are split into chunks to stay under PostgREST payload limits
+BULK_CHUNK_SIZE = int(os.getenv("SUPABASE_BULK_CHUNK_SIZE", "1000"))
+MIN_BULK_CHUNK_SIZE = 50
+
+# reddit_id is unique per collection job (the partition key of reddit_posts/reddit_comments)
+POST_CONFLICT_COLUMNS = ("reddit_id", "collection_job_id")
+
+def _chunked(iterable, size: int = BULK_CHUNK_SIZE):
+    """Yield successive lists of at most size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _is_payload_too_large(error: Exception) -> bool:
+    """Check whether a REST error was an HTTP 413 (request body too large)"""
+    response = getattr(error, "response", None)  # httpx.HTTPStatusError
+    if response is not None:
+        return response.status_code == 413
+    # postgrest's APIError carries the HTTP status as its code when the body isn't JSON
+    if str(getattr(error, "code", "")) == "413":
+        return True
+    # A gateway's JSON 413 body names the status but has no code
+    message = str(getattr(error, "message", "") or "").strip().lower()
+    return message in ("payload too large", "request entity too large")
+
 class SupabaseService:
     """Service for Supabase-specific operations"""
     
     def __init__(self):
-        self.client = supabase_client
-        self.enabled = USE_SUPABASE and supabase_client is not None
+        self.enabled = SUPABASE_ENABLED
         
         if not self.enabled:
             logger.warning("Supabase service disabled - client not available")
     
+    @property
+    def client(self):
+        """Supabase client, created on first use"""
+        return get_supabase_client()
+    
     def is_enabled(self) -> bool:
         """Check if Supabase is enabled and available"""
         return self.enabled
     
-    async def insert_post_with_realtime(self, post_data: Dict[str, Any]) -> Optional[Dict]:
-        """Insert a Reddit post with real-time updates and duplicate handling"""
+    async def update_job_status_realtime(self, job_id: str, status: Union[JobStatus, str, int], progress: int = None) -> bool:
+        """
+        Update collection job status with real-time notifications
+        
+        Sends Prefer: return=minimal, so the updated row is not serialized
+        back. Use update_job_status_returning() when the row is needed.
+        """
         if not self.enabled:
-            return None
+            return False
             
         try:
-            # Use upsert to handle duplicates gracefully
-            result = self.client.table("reddit_posts").upsert(post_data, on_conflict="reddit_id").execute()
-            return result.data[0] if result.data else None
+            self._update_job_status(job_id, status, progress, returning="minimal")
+            return True
         except Exception as e:
-            logger.error(f"Error inserting post to Supabase: {e}")
-            return None
+            logger.error(f"Error updating job status in Supabase: {e}")
+            return False
     
-    async def update_job_status_realtime(self, job_id: str, status: str, progress: int = None) -> Optional[Dict]:
-        """Update collection job status with real-time notifications"""
+    async def update_job_status_returning(self, job_id: str, status: Union[JobStatus, str, int], progress: int = None) -> Optional[Dict]:
+        """Update collection job status and return the updated job row"""
         if not self.enabled:
             return None
             
         try:
-            update_data = {
-                "status": status,
-                "updated_at": datetime.utcnow().isoformat()
-            }
-            if progress is not None:
-                update_data["progress"] = progress
-                
-            result = self.client.table("collection_jobs").update(update_data).eq("job_id", job_id).execute()
+            result = self._update_job_status(job_id, status, progress, returning="representation")
             return result.data[0] if result.data else None
         except Exception as e:
             logger.error(f"Error updating job status in Supabase: {e}")
             return None
     
+    def _update_job_status(self, job_id: str, status: Union[JobStatus, str, int], progress: Optional[int], returning: str):
+        """Send the collection_jobs status update with the given Prefer: return mode"""
+        # status is stored as its smallint code; updated_at is set
+        # server-side by the collection_jobs BEFORE UPDATE trigger
+        update_data = {"status": job_status_code(status)}
+        if progress is not None:
+            update_data["progress"] = progress
+            
+        return self.client.table("collection_jobs") \
+            .update(update_data, returning=returning) \
+            .eq("job_id", job_id) \
+            .execute()
+    
     async def subscribe_to_job_updates(self, job_id: str, callback):
-        """Subscribe to real-time updates for a specific job"""
+        """
+        Subscribe to real-time updates for a specific job
+        
+        Listens on the 'job_<job_id>' channel fed by the collection_jobs
+        NOTIFY trigger (see supabase_tables.sql). Each payload already carries
+        status, progress and collected counts, so no follow-up queries are
+        needed. SUPABASE_DB_URL must be a direct or session-mode connection
+        since LISTEN does not survive transaction pooling.
+        
+        Returns:
+            The listening asyncpg connection; close it to unsubscribe
+        """
         if not self.enabled:
             return None
+        if not SUPABASE_DB_URL:
+            logger.error("SUPABASE_DB_URL is required for job update subscriptions")
+            return None
             
         try:
-            # Set up real-time subscription
-            def handle_change(payload):
-                if payload.get("eventType") in ["UPDATE", "INSERT"]:
-                    callback(payload.get("new"))
+            def handle_notification(connection, pid, channel, payload):
+                update = json.loads(payload)
+                update["status"] = JOB_STATUSES[update["status"]].value
+                callback(update)
             
-            # Subscribe to changes for this specific job
-            subscription = self.client.realtime.channel(f"job_{job_id}") \
-                .on("postgres_changes", {
-                    "event": "*",
-                    "schema": "public", 
-                    "table": "collection_jobs",
-                    "filter": f"job_id=eq.{job_id}"
-                }, handle_change) \
-                .subscribe()
-                
-            return subscription
+            connection = await asyncpg.connect(SUPABASE_DB_URL)
+            await connection.add_listener(f"job_{job_id}", handle_notification)
+            return connection
         except Exception as e:
             logger.error(f"Error setting up Supabase subscription: {e}")
             return None
@@ -89,30 +144,22 @@ class SupabaseService:
             
         try:
             # Get current job stats
-            job_result = self.client.table("collection_jobs").select("*").eq("job_id", job_id).execute()
+            job_result = self.client.table("collection_jobs") \
+                .select("status, progress, collected_posts, collected_comments, created_at, updated_at") \
+                .eq("job_id", job_id) \
+                .execute()
             if not job_result.data:
                 return None
                 
+            # collected_posts/collected_comments are kept current by run_collection_job
             job = job_result.data[0]
             
-            # Get post count
-            posts_result = self.client.table("reddit_posts") \
-                .select("id", count="exact") \
-                .eq("collection_job_id", job["id"]) \
-                .execute()
-                
-            # Get comment count  
-            comments_result = self.client.table("reddit_comments") \
-                .select("id", count="exact") \
-                .eq("collection_job_id", job["id"]) \
-                .execute()
-            
             return {
                 "job_id": job_id,
-                "status": job["status"],
+                "status": JOB_STATUSES[job["status"]].value,
                 "progress": job["progress"],
-                "posts_collected": posts_result.count or 0,
-                "comments_collected": comments_result.count or 0,
+                "posts_collected": job["collected_posts"],
+                "comments_collected": job["collected_comments"],
                 "created_at": job["created_at"],
                 "updated_at": job["updated_at"]
             }
@@ -120,28 +167,84 @@ class SupabaseService:
             logger.error(f"Error getting Supabase analytics: {e}")
             return None
     
+    def _upsert_chunked(self, table: str, rows: List[Dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+        """
+        Upsert rows on (reddit_id, collection_job_id) in chunks, returning the number of rows written
+        
+        A chunk rejected as too large is retried in halves down to
+        MIN_BULK_CHUNK_SIZE rows before the error is raised.
+        """
+        written = 0
+        for chunk in _chunked(rows, chunk_size):
+            try:
+                # Use upsert to handle duplicates gracefully
+                self.client.table(table).upsert(chunk, on_conflict=",".join(POST_CONFLICT_COLUMNS), returning="minimal").execute()
+                written += len(chunk)
+            except Exception as e:
+                if not _is_payload_too_large(e) or chunk_size <= MIN_BULK_CHUNK_SIZE:
+                    raise
+                logger.warning(f"Upsert of {len(chunk)} rows into {table} too large, retrying in smaller chunks")
+                written += self._upsert_chunked(table, chunk, max(chunk_size // 2, MIN_BULK_CHUNK_SIZE))
+        return written
+    
+    async def bulk_upsert_via_core(self, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Upsert posts through SQLAlchemy Core as multi-row INSERT ... ON CONFLICT
+        
+        Goes through SessionLocal rather than the REST client, so it also works
+        when Supabase is disabled. Rows are written in chunks of BULK_CHUNK_SIZE
+        and every row must carry the same keys, including reddit_id and
+        collection_job_id.
+        
+        Returns:
+            Mapping of reddit_id to the stored post id
+        """
+        if not rows:
+            return {}
+        return await asyncio.to_thread(self._upsert_posts_core, rows)
+    
+    def _upsert_posts_core(self, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Run the chunked post upsert in a single transaction"""
+        db = SessionLocal()
+        try:
+            insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+            # ON CONFLICT cannot update the same row twice within one statement
+            unique_rows = list({(row["reddit_id"], row["collection_job_id"]): row for row in rows}.values())
+            post_ids = {}
+            for chunk in _chunked(unique_rows, BULK_CHUNK_SIZE):
+                stmt = insert(RedditPost).values(chunk)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[RedditPost.reddit_id, RedditPost.collection_job_id],
+                    set_={col: stmt.excluded[col] for col in chunk[0] if col not in POST_CONFLICT_COLUMNS}
+                ).returning(RedditPost.id, RedditPost.reddit_id)
+                for post_id, reddit_id in db.execute(stmt):
+                    post_ids[reddit_id] = post_id
+            db.commit()
+            return post_ids
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
     async def bulk_insert_posts(self, posts_data: List[Dict[str, Any]]) -> bool:
         """Bulk insert posts for better performance with duplicate handling"""
         if not self.enabled or not posts_data:
             return False
             
         try:
-            # Use upsert to handle duplicates gracefully
-            result = self.client.table("reddit_posts").upsert(posts_data, on_conflict="reddit_id").execute()
-            return len(result.data) > 0
+            return self._upsert_chunked("reddit_posts", posts_data) > 0
         except Exception as e:
             logger.error(f"Error bulk inserting posts to Supabase: {e}")
             return False
     
     async def bulk_insert_comments(self, comments_data: List[Dict[str, Any]]) -> bool:
-        """Bulk insert comments for better performance with duplicate handling"""
+        """Bulk insert comments (each carrying collection_job_id) with duplicate handling"""
         if not self.enabled or not comments_data:
             return False
             
         try:
-            # Use upsert to handle duplicates gracefully
-            result = self.client.table("reddit_comments").upsert(comments_data, on_conflict="reddit_id").execute()
-            return len(result.data) > 0
+            return self._upsert_chunked("reddit_comments", comments_data) > 0
         except Exception as e:
             logger.error(f"Error bulk inserting comments to Supabase: {e}")
             return False
@@ -17,7 +17,7 @@ CREATE TABLE IF NOT EXISTS collection_jobs (
     date_to TIMESTAMP WITH TIME ZONE,
     exclude_nsfw BOOLEAN DEFAULT TRUE,
     anonymize_users BOOLEAN DEFAULT TRUE,
-    status TEXT DEFAULT 'pending',
+    status SMALLINT DEFAULT 0 CHECK (status IN (0, 1, 2, 3, 4)),  -- pending, running, completed, failed, cancelled
     progress INTEGER DEFAULT 0,
     total_expected INTEGER DEFAULT 0,
     collected_posts INTEGER DEFAULT 0,
@@ -29,11 +29,31 @@ CREATE TABLE IF NOT EXISTS collection_jobs (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
--- Create reddit_posts table
+-- Existing installs: convert a text/enum status column to the smallint codes
+-- above (CREATE TABLE IF NOT EXISTS leaves an existing column as it is)
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = 'collection_jobs' AND column_name = 'status') <> 'smallint' THEN
+        ALTER TABLE collection_jobs
+            ALTER COLUMN status DROP DEFAULT,
+            ALTER COLUMN status TYPE smallint USING (CASE lower(status::text)
+                WHEN 'pending' THEN 0 WHEN 'running' THEN 1 WHEN 'completed' THEN 2
+                WHEN 'failed' THEN 3 WHEN 'cancelled' THEN 4 END),
+            ALTER COLUMN status SET DEFAULT 0,
+            ADD CONSTRAINT ck_collection_jobs_status CHECK (status IN (0, 1, 2, 3, 4));
+    END IF;
+END $$;
+
+-- Create reddit_posts table, hash-partitioned on collection_job_id so queries
+-- for one job are pruned to a single partition. Keys must include the
+-- partition column, so reddit_id is unique per job. CREATE TABLE IF NOT EXISTS
+-- leaves an existing unpartitioned table as it is; recreate it to partition.
 CREATE TABLE IF NOT EXISTS reddit_posts (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    collection_job_id UUID REFERENCES collection_jobs(id),
-    reddit_id TEXT UNIQUE NOT NULL,
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    collection_job_id UUID NOT NULL REFERENCES collection_jobs(id),
+    reddit_id TEXT NOT NULL,
     title TEXT NOT NULL,
     selftext TEXT,
     url TEXT,
@@ -52,14 +72,17 @@ CREATE TABLE IF NOT EXISTS reddit_posts (
     created_utc TIMESTAMP WITH TIME ZONE NOT NULL,
     collected_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     sentiment_score FLOAT,
-    readability_score FLOAT
-);
+    readability_score FLOAT,
+    PRIMARY KEY (id, collection_job_id),
+    UNIQUE (reddit_id, collection_job_id)
+) PARTITION BY HASH (collection_job_id);
 
--- Create reddit_comments table
+-- Create reddit_comments table, partitioned like reddit_posts
 CREATE TABLE IF NOT EXISTS reddit_comments (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    post_id UUID REFERENCES reddit_posts(id) ON DELETE CASCADE,
-    reddit_id TEXT UNIQUE NOT NULL,
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    post_id UUID NOT NULL,
+    collection_job_id UUID NOT NULL REFERENCES collection_jobs(id),
+    reddit_id TEXT NOT NULL,
     body TEXT NOT NULL,
     parent_id TEXT,
     author TEXT,
@@ -71,22 +94,61 @@ CREATE TABLE IF NOT EXISTS reddit_comments (
     is_stickied BOOLEAN DEFAULT FALSE,
     created_utc TIMESTAMP WITH TIME ZONE NOT NULL,
     collected_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    sentiment_score FLOAT
-);
+    sentiment_score FLOAT,
+    PRIMARY KEY (id, collection_job_id),
+    UNIQUE (reddit_id, collection_job_id),
+    FOREIGN KEY (post_id, collection_job_id)
+        REFERENCES reddit_posts(id, collection_job_id) ON DELETE CASCADE
+) PARTITION BY HASH (collection_job_id);
+
+-- 16 hash partitions per table; indexes created on the parents below are
+-- created on every partition as local indexes. Existing unpartitioned tables
+-- are left in place but moved to the same per-job keys.
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'reddit_posts'::regclass) = 'p' THEN
+        FOR i IN 0..15 LOOP
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS reddit_posts_p%s PARTITION OF reddit_posts '
+                'FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i
+            );
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS reddit_comments_p%s PARTITION OF reddit_comments '
+                'FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i
+            );
+        END LOOP;
+    ELSE
+        RAISE NOTICE 'reddit_posts is not partitioned; recreate reddit_posts and reddit_comments to partition them by collection_job_id';
+        ALTER TABLE reddit_comments ADD COLUMN IF NOT EXISTS collection_job_id UUID REFERENCES collection_jobs(id);
+        UPDATE reddit_comments c SET collection_job_id = p.collection_job_id
+        FROM reddit_posts p
+        WHERE c.post_id = p.id AND c.collection_job_id IS NULL;
+        ALTER TABLE reddit_posts DROP CONSTRAINT IF EXISTS reddit_posts_reddit_id_key;
+        ALTER TABLE reddit_comments DROP CONSTRAINT IF EXISTS reddit_comments_reddit_id_key;
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_reddit_posts_reddit_id_job ON reddit_posts(reddit_id, collection_job_id);
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_reddit_comments_reddit_id_job ON reddit_comments(reddit_id, collection_job_id);
+    END IF;
+END $$;
 
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_collection_jobs_job_id ON collection_jobs(job_id);
-CREATE INDEX IF NOT EXISTS idx_collection_jobs_status ON collection_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_collection_jobs_status_created ON collection_jobs(status, created_at);
 CREATE INDEX IF NOT EXISTS idx_collection_jobs_created_at ON collection_jobs(created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_keywords_gin ON collection_jobs USING GIN (keywords);
+CREATE INDEX IF NOT EXISTS idx_jobs_subreddits_gin ON collection_jobs USING GIN (subreddits);
 
 CREATE INDEX IF NOT EXISTS idx_reddit_posts_reddit_id ON reddit_posts(reddit_id);
-CREATE INDEX IF NOT EXISTS idx_reddit_posts_subreddit ON reddit_posts(subreddit);
+-- Covering index for subreddit + score queries (index-only scans); replaces the single-column subreddit index
+DROP INDEX IF EXISTS idx_reddit_posts_subreddit;
+CREATE INDEX IF NOT EXISTS idx_posts_hot ON reddit_posts(subreddit, score DESC) INCLUDE (upvote_ratio, created_utc, num_comments);
 CREATE INDEX IF NOT EXISTS idx_reddit_posts_score ON reddit_posts(score);
 CREATE INDEX IF NOT EXISTS idx_reddit_posts_created_utc ON reddit_posts(created_utc);
+CREATE INDEX IF NOT EXISTS idx_posts_collected_brin ON reddit_posts USING BRIN (collected_at);
 CREATE INDEX IF NOT EXISTS idx_reddit_posts_collection_job_id ON reddit_posts(collection_job_id);
 
 CREATE INDEX IF NOT EXISTS idx_reddit_comments_reddit_id ON reddit_comments(reddit_id);
 CREATE INDEX IF NOT EXISTS idx_reddit_comments_post_id ON reddit_comments(post_id);
+CREATE INDEX IF NOT EXISTS idx_reddit_comments_collection_job_id ON reddit_comments(collection_job_id);
 CREATE INDEX IF NOT EXISTS idx_reddit_comments_score ON reddit_comments(score);
 CREATE INDEX IF NOT EXISTS idx_reddit_comments_created_utc ON reddit_comments(created_utc);
 
@@ -111,6 +173,108 @@ GRANT ALL ON TABLE collection_jobs TO anon, authenticated;
 GRANT ALL ON TABLE reddit_posts TO anon, authenticated;
 GRANT ALL ON TABLE reddit_comments TO anon, authenticated;
 
+-- Let the database stamp updated_at so clients don't send timestamps
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS update_collection_jobs_updated_at ON collection_jobs;
+CREATE TRIGGER update_collection_jobs_updated_at
+    BEFORE UPDATE ON collection_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Push compact job updates over LISTEN/NOTIFY on channel 'job_<job_id>'.
+-- collected_posts/collected_comments are written by the collector, so the
+-- payload carries them without subscribers re-counting rows.
+CREATE OR REPLACE FUNCTION notify_job_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('job_' || NEW.job_id, json_build_object(
+        'job_id', NEW.job_id,
+        'status', NEW.status,
+        'progress', NEW.progress,
+        'collected_posts', NEW.collected_posts,
+        'collected_comments', NEW.collected_comments,
+        'updated_at', NEW.updated_at
+    )::text);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Counters have a single writer (the collector); remove the insert-count
+-- triggers from earlier versions of this script
+DROP TRIGGER IF EXISTS count_reddit_posts_inserted ON reddit_posts;
+DROP TRIGGER IF EXISTS count_reddit_comments_inserted ON reddit_comments;
+DROP FUNCTION IF EXISTS count_job_posts_inserted();
+DROP FUNCTION IF EXISTS count_job_comments_inserted();
+
+DROP TRIGGER IF EXISTS notify_collection_jobs_update ON collection_jobs;
+CREATE TRIGGER notify_collection_jobs_update
+    AFTER UPDATE ON collection_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_job_update();
+
+-- Per-job post aggregates served by /api/data/analytics/{job_id};
+-- refresh with REFRESH MATERIALIZED VIEW CONCURRENTLY analytics_mv
+CREATE MATERIALIZED VIEW IF NOT EXISTS analytics_mv AS
+WITH ranked AS (
+    SELECT p.*,
+           row_number() OVER (
+               PARTITION BY p.collection_job_id ORDER BY p.score DESC NULLS LAST
+           ) AS score_rank
+    FROM reddit_posts p
+    WHERE p.collection_job_id IS NOT NULL
+),
+subreddit_counts AS (
+    SELECT collection_job_id, jsonb_object_agg(subreddit, post_count) AS subreddit_breakdown
+    FROM (
+        SELECT collection_job_id, subreddit, count(*) AS post_count
+        FROM reddit_posts
+        WHERE collection_job_id IS NOT NULL AND subreddit IS NOT NULL
+        GROUP BY collection_job_id, subreddit
+    ) s
+    GROUP BY collection_job_id
+)
+SELECT
+    r.collection_job_id,
+    count(*) AS total_posts,
+    count(DISTINCT r.subreddit) AS unique_subreddits,
+    count(DISTINCT r.author) AS unique_authors,
+    min(r.created_utc) AS earliest_post,
+    max(r.created_utc) AS latest_post,
+    avg(r.score)::float AS avg_score,
+    -- Upper median, matching sorted(scores)[len(scores) // 2] in the Python path
+    (array_agg(r.score ORDER BY r.score) FILTER (WHERE r.score IS NOT NULL))[count(r.score) / 2 + 1] AS median_score,
+    min(r.score) AS min_score,
+    max(r.score) AS max_score,
+    avg(r.upvote_ratio)::float AS avg_upvote_ratio,
+    avg(r.num_comments)::float AS avg_comments,
+    coalesce(sum(r.num_comments), 0) AS total_comments,
+    count(*) FILTER (WHERE r.is_nsfw) AS nsfw_posts,
+    count(*) FILTER (WHERE r.is_stickied) AS stickied_posts,
+    coalesce(
+        jsonb_agg(jsonb_build_object(
+            'title', r.title,
+            'score', r.score,
+            'subreddit', r.subreddit,
+            'author', r.author,
+            'num_comments', r.num_comments,
+            'permalink', r.permalink
+        ) ORDER BY r.score_rank) FILTER (WHERE r.score_rank <= 5),
+        '[]'::jsonb
+    ) AS top_posts,
+    coalesce(sc.subreddit_breakdown, '{}'::jsonb) AS subreddit_breakdown
+FROM ranked r
+LEFT JOIN subreddit_counts sc ON sc.collection_job_id = r.collection_job_id
+GROUP BY r.collection_job_id, sc.subreddit_breakdown;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_analytics_mv_job ON analytics_mv(collection_job_id);
+
 -- To use this SQL script:
 --
 -- 1. Go to your Supabase dashboard
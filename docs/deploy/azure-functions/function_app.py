@@ -11,15 +11,15 @@ sys.path.insert(0, str(backend_path))
 from main import app as fastapi_app
 
 # Create Azure Functions app
-app = func.AsgiFunctionApp(
-    app=fastapi_app,
-    http_auth_level=func.AuthLevel.ANONYMOUS
-)
+app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
+
+# Build the ASGI bridge once per worker process and reuse it across invocations
+asgi_middleware = func.AsgiMiddleware(fastapi_app)
 
 @app.function_name(name="trendit_api")
 @app.route(route="{*route}", auth_level=func.AuthLevel.ANONYMOUS)
-async def main(req: func.HttpRequest) -> func.HttpResponse:
+async def main(req: func.HttpRequest, context: func.Context) -> func.HttpResponse:
     """
     Azure Function entry point that forwards all requests to FastAPI
     """
-    return await func.AsgiMiddleware(fastapi_app).handle_async(req)
\ No newline at end of file
+    return await asgi_middleware.handle_async(req, context)
@@ -37,7 +37,7 @@ CREATE TABLE IF NOT EXISTS collection_jobs (
     anonymize_users BOOLEAN DEFAULT true,
     
     -- Status and progress
-    status VARCHAR DEFAULT 'pending',
+    status SMALLINT DEFAULT 0 CHECK (status IN (0, 1, 2, 3, 4)),  -- pending, running, completed, failed, cancelled
     progress INTEGER DEFAULT 0,
     total_expected INTEGER DEFAULT 0,
     collected_posts INTEGER DEFAULT 0,
@@ -51,13 +51,30 @@ CREATE TABLE IF NOT EXISTS collection_jobs (
     updated_at TIMESTAMP WITH TIME ZONE
 );
 
+-- Existing installs: convert a text/enum status column to the smallint codes
+-- above (CREATE TABLE IF NOT EXISTS leaves an existing column as it is)
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = 'collection_jobs' AND column_name = 'status') <> 'smallint' THEN
+        ALTER TABLE collection_jobs
+            ALTER COLUMN status DROP DEFAULT,
+            ALTER COLUMN status TYPE smallint USING (CASE lower(status::text)
+                WHEN 'pending' THEN 0 WHEN 'running' THEN 1 WHEN 'completed' THEN 2
+                WHEN 'failed' THEN 3 WHEN 'cancelled' THEN 4 END),
+            ALTER COLUMN status SET DEFAULT 0,
+            ADD CONSTRAINT ck_collection_jobs_status CHECK (status IN (0, 1, 2, 3, 4));
+    END IF;
+END $$;
+
 -- Reddit posts table
 CREATE TABLE IF NOT EXISTS reddit_posts (
     id SERIAL PRIMARY KEY,
     collection_job_id INTEGER REFERENCES collection_jobs(id) ON DELETE CASCADE,
     
-    -- Reddit data
-    reddit_id VARCHAR UNIQUE NOT NULL,
+    -- Reddit data (reddit_id is unique per collection job)
+    reddit_id VARCHAR NOT NULL,
     title TEXT,
     selftext TEXT,
     url VARCHAR,
@@ -92,7 +109,9 @@ CREATE TABLE IF NOT EXISTS reddit_posts (
     sentiment_label VARCHAR,
     
     -- Timestamps
-    collected_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    collected_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    
+    CONSTRAINT uq_reddit_posts_reddit_id_job UNIQUE (reddit_id, collection_job_id)
 );
 
 -- Reddit comments table
@@ -101,8 +120,8 @@ CREATE TABLE IF NOT EXISTS reddit_comments (
     collection_job_id INTEGER REFERENCES collection_jobs(id) ON DELETE CASCADE,
     post_id INTEGER REFERENCES reddit_posts(id) ON DELETE CASCADE,
     
-    -- Reddit data
-    reddit_id VARCHAR UNIQUE NOT NULL,
+    -- Reddit data (reddit_id is unique per collection job)
+    reddit_id VARCHAR NOT NULL,
     parent_id VARCHAR,
     body TEXT,
     permalink VARCHAR,
@@ -133,9 +152,18 @@ CREATE TABLE IF NOT EXISTS reddit_comments (
     sentiment_label VARCHAR,
     
     -- Timestamps
-    collected_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    collected_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    
+    CONSTRAINT uq_reddit_comments_reddit_id_job UNIQUE (reddit_id, collection_job_id)
 );
 
+-- Existing deployments: scope reddit_id uniqueness to the collection job, the
+-- target of the app's ON CONFLICT (reddit_id, collection_job_id) upserts
+ALTER TABLE reddit_posts DROP CONSTRAINT IF EXISTS reddit_posts_reddit_id_key;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_reddit_posts_reddit_id_job ON reddit_posts(reddit_id, collection_job_id);
+ALTER TABLE reddit_comments DROP CONSTRAINT IF EXISTS reddit_comments_reddit_id_key;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_reddit_comments_reddit_id_job ON reddit_comments(reddit_id, collection_job_id);
+
 -- Reddit users table
 CREATE TABLE IF NOT EXISTS reddit_users (
     id SERIAL PRIMARY KEY,
@@ -182,13 +210,18 @@ CREATE TABLE IF NOT EXISTS analytics (
 
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_collection_jobs_job_id ON collection_jobs(job_id);
-CREATE INDEX IF NOT EXISTS idx_collection_jobs_status ON collection_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_collection_jobs_status_created ON collection_jobs(status, created_at);
 CREATE INDEX IF NOT EXISTS idx_collection_jobs_created_at ON collection_jobs(created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_keywords_gin ON collection_jobs USING GIN (keywords);
+CREATE INDEX IF NOT EXISTS idx_jobs_subreddits_gin ON collection_jobs USING GIN (subreddits);
 
 CREATE INDEX IF NOT EXISTS idx_reddit_posts_reddit_id ON reddit_posts(reddit_id);
 CREATE INDEX IF NOT EXISTS idx_reddit_posts_collection_job_id ON reddit_posts(collection_job_id);
-CREATE INDEX IF NOT EXISTS idx_reddit_posts_subreddit ON reddit_posts(subreddit);
+-- Covering index for subreddit + score queries (index-only scans); replaces the single-column subreddit index
+DROP INDEX IF EXISTS idx_reddit_posts_subreddit;
+CREATE INDEX IF NOT EXISTS idx_posts_hot ON reddit_posts(subreddit, score DESC) INCLUDE (upvote_ratio, created_utc, num_comments);
 CREATE INDEX IF NOT EXISTS idx_reddit_posts_created_utc ON reddit_posts(created_utc);
+CREATE INDEX IF NOT EXISTS idx_posts_collected_brin ON reddit_posts USING BRIN (collected_at);
 CREATE INDEX IF NOT EXISTS idx_reddit_posts_score ON reddit_posts(score);
 
 CREATE INDEX IF NOT EXISTS idx_reddit_comments_reddit_id ON reddit_comments(reddit_id);
@@ -229,4 +262,35 @@ $$ language 'plpgsql';
 CREATE TRIGGER update_collection_jobs_updated_at 
     BEFORE UPDATE ON collection_jobs 
     FOR EACH ROW 
-    EXECUTE FUNCTION update_updated_at_column();
\ No newline at end of file
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Push compact job updates over LISTEN/NOTIFY on channel 'job_<job_id>'.
+-- collected_posts/collected_comments are written by the collector, so the
+-- payload carries them without subscribers re-counting rows.
+CREATE OR REPLACE FUNCTION notify_job_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('job_' || NEW.job_id, json_build_object(
+        'job_id', NEW.job_id,
+        'status', NEW.status,
+        'progress', NEW.progress,
+        'collected_posts', NEW.collected_posts,
+        'collected_comments', NEW.collected_comments,
+        'updated_at', NEW.updated_at
+    )::text);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Counters have a single writer (the collector); remove the insert-count
+-- triggers from earlier versions of this script
+DROP TRIGGER IF EXISTS count_reddit_posts_inserted ON reddit_posts;
+DROP TRIGGER IF EXISTS count_reddit_comments_inserted ON reddit_comments;
+DROP FUNCTION IF EXISTS count_job_posts_inserted();
+DROP FUNCTION IF EXISTS count_job_comments_inserted();
+
+DROP TRIGGER IF EXISTS notify_collection_jobs_update ON collection_jobs;
+CREATE TRIGGER notify_collection_jobs_update
+    AFTER UPDATE ON collection_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_job_update();
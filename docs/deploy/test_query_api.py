@@ -1,18 +1,26 @@
 #!/usr/bin/env python3
 """
 Test script for Query API endpoints
+
+All tests run concurrently over one HTTP/2 client, so the reported
+execution times reflect the server under parallel load.
 """
 
-import requests
-import json
-import time
+import asyncio
+import httpx
 
 BASE_URL = "http://localhost:8000"
 
-def test_complex_post_query():
+async def send(client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request, waiting out one 429 response using the server's Retry-After header"""
+    response = await client.request(method, url, **kwargs)
+    if response.status_code == 429:
+        await asyncio.sleep(float(response.headers.get("Retry-After", 1)))
+        response = await client.request(method, url, **kwargs)
+    return response
+
+async def test_complex_post_query(client: httpx.AsyncClient):
     """Test complex POST query with multiple filters"""
-    print("Testing complex post query...")
-    
     query_data = {
         "subreddits": ["python", "programming"],
         "keywords": ["fastapi", "async"],
@@ -24,66 +32,56 @@ def test_complex_post_query():
         "limit": 5,
         "include_self_text": False
     }
-    
-    response = requests.post(
-        f"{BASE_URL}/api/query/posts",
-        json=query_data,
-        headers={"Content-Type": "application/json"}
-    )
-    
+
+    response = await send(client, "POST", "/api/query/posts", json=query_data)
+
     if response.status_code == 200:
         data = response.json()
-        print(f"✅ Complex query successful!")
+        print(f"\n✅ Complex query successful!")
         print(f"   Results: {data['count']}")
         print(f"   Execution time: {data['execution_time_ms']:.2f}ms")
         print(f"   Reddit API calls: {data['reddit_api_calls']}")
         print(f"   Filters applied: {data['filters_applied']}")
-        
+
         if data['results']:
             post = data['results'][0]
             print(f"   Sample post: {post['title'][:60]}... (Score: {post['score']})")
         return True
     else:
-        print(f"❌ Complex query failed: {response.status_code}")
+        print(f"\n❌ Complex query failed: {response.status_code}")
         print(f"   Error: {response.text}")
         return False
 
-def test_user_query():
+async def test_user_query(client: httpx.AsyncClient):
     """Test user query"""
-    print("\nTesting user query...")
-    
     query_data = {
         "usernames": ["spez", "kn0thing"],  # Reddit founders
         "limit": 2
     }
-    
-    response = requests.post(
-        f"{BASE_URL}/api/query/users",
-        json=query_data,
-        headers={"Content-Type": "application/json"}
-    )
-    
+
+    response = await send(client, "POST", "/api/query/users", json=query_data)
+
     if response.status_code == 200:
         data = response.json()
-        print(f"✅ User query successful!")
+        print(f"\n✅ User query successful!")
         print(f"   Results: {data['count']}")
         print(f"   Execution time: {data['execution_time_ms']:.2f}ms")
-        
+
         if data['results']:
             user = data['results'][0]
             print(f"   Sample user: {user['username']} (Karma: {user.get('total_karma', 'N/A')})")
         return True
     else:
-        print(f"❌ User query failed: {response.status_code}")
+        print(f"\n❌ User query failed: {response.status_code}")
         print(f"   Error: {response.text}")
         return False
 
-def test_simple_get_query():
+async def test_simple_get_query(client: httpx.AsyncClient):
     """Test simple GET query"""
-    print("\nTesting simple GET query...")
-    
-    response = requests.get(
-        f"{BASE_URL}/api/query/posts/simple",
+    response = await send(
+        client,
+        "GET",
+        "/api/query/posts/simple",
         params={
             "subreddits": "python",
             "keywords": "django",
@@ -91,64 +89,67 @@ def test_simple_get_query():
             "limit": 3
         }
     )
-    
+
     if response.status_code == 200:
         data = response.json()
-        print(f"✅ Simple GET query successful!")
+        print(f"\n✅ Simple GET query successful!")
         print(f"   Results: {data['count']}")
         print(f"   Execution time: {data['execution_time_ms']:.2f}ms")
         return True
     else:
-        print(f"❌ Simple GET query failed: {response.status_code}")
+        print(f"\n❌ Simple GET query failed: {response.status_code}")
         print(f"   Error: {response.text}")
         return False
 
-def test_health_check():
+async def test_health_check(client: httpx.AsyncClient):
     """Test API health"""
-    print("\nTesting API health...")
-    
-    response = requests.get(f"{BASE_URL}/health")
-    
+    response = await send(client, "GET", "/health")
+
     if response.status_code == 200:
         data = response.json()
-        print(f"✅ API healthy!")
+        print(f"\n✅ API healthy!")
         print(f"   Status: {data['status']}")
         print(f"   Database: {data['database']}")
         print(f"   Reddit API: {data['reddit_api']}")
         return True
     else:
-        print(f"❌ API health check failed: {response.status_code}")
+        print(f"\n❌ API health check failed: {response.status_code}")
         return False
 
-def main():
-    """Run all tests"""
+async def main():
+    """Run all tests concurrently"""
     print("🔥 Trendit Query API Test Suite")
     print("=" * 40)
-    
+
     tests = [
         test_health_check,
         test_simple_get_query,
         test_complex_post_query,
         test_user_query
     ]
-    
+
+    # Reddit-backed queries can take well over httpx's 5s default
+    async with httpx.AsyncClient(base_url=BASE_URL, http2=True, timeout=60.0) as client:
+        outcomes = await asyncio.gather(
+            *(test(client) for test in tests),
+            return_exceptions=True
+        )
+
     results = []
-    for test in tests:
-        try:
-            result = test()
-            results.append(result)
-            time.sleep(1)  # Rate limiting
-        except Exception as e:
-            print(f"❌ Test failed with exception: {e}")
+    for test, outcome in zip(tests, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"\n❌ {test.__name__} failed with exception: {outcome}")
             results.append(False)
-    
+        else:
+            results.append(outcome)
+
     print("\n" + "=" * 40)
     print(f"Test Results: {sum(results)}/{len(results)} passed")
-    
+
     if all(results):
         print("🎉 All Query API tests passed!")
     else:
         print("⚠️  Some tests failed")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())